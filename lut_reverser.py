@@ -2,27 +2,97 @@ import PyOpenColorIO as ocio
 import os
 import sys
 import re
+import io
+import functools
+import threading
+import glob
+import warnings
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import matplotlib
 matplotlib.use('Agg')  # Non-interactive backend for headless/script usage
 import matplotlib.pyplot as plt
 
+try:
+    import cupy
+except ImportError:  # GPU inversion is optional
+    cupy = None
+
+try:
+    import numba
+except ImportError:  # JIT-compiled CPU inversion is optional
+    numba = None
+
+# Output cube size used when none is given or found in the input file
+DEFAULT_CUBE_SIZE = 33
+# Newton refinement steps used by the NumPy LUT inversion
+_NEWTON_ITERATIONS = 4
+# Residual below which a voxel counts as inverted and stops iterating
+_NEWTON_TOLERANCE = 1e-5
+# Resolution of the coarse forward lattice and target grid that seed the inversion
+_SEED_GRID_SIZE = 9
+# Tetrahedron lookup for fractional coordinates (f0, f1, f2), indexed by the
+# code (f0 >= f1) << 2 | (f1 >= f2) << 1 | (f0 >= f2). _TET_ORDER lists the
+# axes by decreasing fraction (ties keep axis order); _TET_RANK is its
+# inverse. Codes 1 and 6 cannot occur.
+_TET_ORDER = np.array([[2, 1, 0], [0, 1, 2], [1, 2, 0], [1, 0, 2],
+                       [2, 0, 1], [0, 2, 1], [0, 1, 2], [0, 1, 2]], dtype=np.intp)
+_TET_RANK = np.argsort(_TET_ORDER, axis=1)
+# Smallest cube size inverted with a float16 LUT when --half is given; below
+# it the half-precision roundoff would be visible in the output
+_GPU_HALF_MIN_SIZE = 18
+# Output rows formatted per write when saving a LUT
+_WRITE_CHUNK_ROWS = 4096
+_ROW_FORMAT = "%.6f %.6f %.6f\n"
+# The LUT_3D_SIZE declaration, searched for in raw header bytes
+_SIZE_RE = re.compile(rb'^[ \t]*LUT_3D_SIZE[ \t]+(\d+)', re.I | re.M)
+# The first line of a .cube table, i.e. the first line starting with a number
+_DATA_START_RE = re.compile(rb'^[ \t]*[-+.\d]', re.M)
+
+# Serializes use of the shared OCIO config; hold it to reconfigure it from several threads
+_OCIO_LOCK = threading.Lock()
+# Last modification time seen per LUT path by the OCIO fallback
+_OCIO_MTIMES = {}
+
 def get_lut_size_from_file(lut_path):
-    """Reads the LUT_3D_SIZE from a .cube file header."""
+    """Reads the LUT_3D_SIZE from a .cube file header.
+
+    Results are cached per (path, modification time).
+    """
+    try:
+        mtime = os.path.getmtime(lut_path)
+    except OSError as e:
+        print(f"Warning: Could not read LUT size from {lut_path}: {e}")
+        return None
+    return _read_lut_size(os.path.abspath(lut_path), mtime)
+
+
+@functools.lru_cache(maxsize=256)
+def _read_lut_size(lut_path, mtime):
+    """Scan the header for LUT_3D_SIZE; cached on (path, mtime)."""
     try:
-        with open(lut_path, 'r') as f:
+        # The size is normally declared near the top, in the first 4 KiB
+        with open(lut_path, 'rb') as f:
+            head = f.read(4096)
+
+        # A number running into the end of a full head may be cut off
+        match = _SIZE_RE.search(head)
+        if match and (match.end() < len(head) or len(head) < 4096):
+            return int(match.group(1))
+
+        # Rare: a long comment block pushed the header past the first 4 KiB
+        with open(lut_path, 'rb') as f:
             for line in f:
                 line = line.strip()
-                if line.startswith('#') or not line:
+                if line.startswith(b'#') or not line:
                     continue
-                # Use regex to find LUT_3D_SIZE followed by a number
-                match = re.match(r'^LUT_3D_SIZE\s+(\d+)', line, re.IGNORECASE)
+                match = _SIZE_RE.match(line)
                 if match:
                     return int(match.group(1))
                 # Stop reading after finding the first non-comment, non-empty line
                 # if it wasn't the LUT size (or if we found it).
                 # Assumes LUT_3D_SIZE is near the top.
-                if not line.startswith('DOMAIN_MIN') and not line.startswith('DOMAIN_MAX') and not line.startswith('TITLE'):
+                if not line.startswith((b'DOMAIN_MIN', b'DOMAIN_MAX', b'TITLE')):
                      break # Avoid reading the whole data table
     except Exception as e:
         print(f"Warning: Could not read LUT size from {lut_path}: {e}")
@@ -31,6 +101,10 @@ def get_lut_size_from_file(lut_path):
 def _create_ocio_processor(lut_path):
     """Create an OCIO CPUProcessor that applies the LUT as a forward transform.
 
+    .cube tables are parsed once by _load_cube and handed to OCIO as an
+    in-memory Lut3DTransform; other files go through a FileTransform.
+    Tetrahedral interpolation matches the model the inversion solves.
+
     Args:
         lut_path (str): Path to a .cube LUT file.
 
@@ -42,13 +116,22 @@ def _create_ocio_processor(lut_path):
     config.addColorSpace(raw_cs)
     config.setRole(ocio.ROLE_SCENE_LINEAR, "raw")
 
+    try:
+        lut = _load_cube(lut_path)
+    except ValueError:
+        transform = ocio.FileTransform(lut_path, interpolation=ocio.INTERP_TETRAHEDRAL)
+    else:
+        # Lut3DTransform data is ordered [R][G][B], blue fastest, like our array
+        transform = ocio.Lut3DTransform(gridSize=lut.shape[0])
+        transform.setData(lut.ravel())
+        transform.setInterpolation(ocio.INTERP_TETRAHEDRAL)
+
     lut_cs = ocio.ColorSpace(name="lut_cs")
-    ft = ocio.FileTransform(lut_path, interpolation=ocio.INTERP_LINEAR)
-    lut_cs.setTransform(ft, ocio.COLORSPACE_DIR_FROM_REFERENCE)
+    lut_cs.setTransform(transform, ocio.COLORSPACE_DIR_FROM_REFERENCE)
     config.addColorSpace(lut_cs)
 
     processor = config.getProcessor("raw", "lut_cs")
-    return processor.getDefaultCPUProcessor()
+    return processor.getOptimizedCPUProcessor(ocio.OPTIMIZATION_DEFAULT)
 
 
 def compute_roundtrip_error(forward_path, reversed_path, grid_size):
@@ -194,76 +277,588 @@ def generate_irreversibility_map(error_3d, grid_size, output_dir, lut_name,
     print(f"  Saved error histogram: {hist_path}")
 
 
-def reverse_lut(input_lut_path, output_lut_path, cube_size=33):
+def _load_cube(lut_path):
+    """Load the table of a 3D .cube file into an (N, N, N, 3) float32 array.
+
+    The array is indexed [R][G][B]. Only plain 3D LUTs over the unit domain
+    are supported; anything else raises ValueError so the caller can fall
+    back to OpenColorIO.
+
+    Args:
+        lut_path (str): Path to a .cube LUT file.
+
+    Returns:
+        np.ndarray: (N, N, N, 3) float32 array of LUT output values. The
+        array is shared with the load cache and is read-only.
     """
-    Reverses a 3D LUT file using OpenColorIO.
+    return _probe_and_load(lut_path)[1]
+
+
+def _probe_and_load(lut_path):
+    """Read both the size and the table of a .cube file in a single open.
+
+    Results are cached per (path, modification time), so probing the size
+    and then reversing the same LUT only reads it once.
 
     Args:
-        input_lut_path (str): Path to the input .cube LUT file.
-        output_lut_path (str): Path to save the reversed .cube LUT file.
-        cube_size (int): The resolution of the output reversed LUT.
+        lut_path (str): Path to a .cube LUT file.
+
+    Returns:
+        tuple: (size, lut) — the LUT_3D_SIZE and the array from _load_cube.
     """
-    if not os.path.exists(input_lut_path):
-        print(f"Error: Input LUT file not found: {input_lut_path}")
-        return
+    lut_path = os.path.abspath(lut_path)
+    lut = _read_cube(lut_path, os.path.getmtime(lut_path))
+    return lut.shape[0], lut
+
+
+@functools.lru_cache(maxsize=8)
+def _read_cube(lut_path, mtime):
+    """Parse a .cube file; cached on (path, mtime). See _load_cube.
+
+    The file is read once; the header regexes and the bulk float parse of
+    the table both work on that buffer.
+    """
+    with open(lut_path, 'rb') as f:
+        content = f.read()
+
+    match = _DATA_START_RE.search(content)
+    start = match.start() if match else len(content)
+
+    match = _SIZE_RE.search(content, 0, start)
+    if not match:
+        raise ValueError("LUT_3D_SIZE not found")
+    size = int(match.group(1))
+
+    for line in content[:start].decode('latin-1').splitlines():
+        parts = line.split()
+        if not parts or parts[0].startswith('#'):
+            continue
+        keyword = parts[0].upper()
+        if keyword in ('DOMAIN_MIN', 'DOMAIN_MAX'):
+            expected = 0.0 if keyword == 'DOMAIN_MIN' else 1.0
+            if any(float(v) != expected for v in parts[1:4]):
+                raise ValueError("Non-unit LUT domains are not supported")
+        elif keyword == 'LUT_1D_SIZE':
+            raise ValueError("1D and shaper LUTs are not supported")
+        elif keyword not in ('TITLE', 'LUT_3D_SIZE'):
+            raise ValueError(f"Unsupported .cube keyword: {parts[0]}")
 
+    body = content[start:]
+
+    # The bulk parse ignores line breaks, so only trust it when the table
+    # has exactly one line per entry; loadtxt checks the rows otherwise
+    data = None
+    if body.rstrip().count(b'\n') + 1 == size ** 3:
+        try:
+            with warnings.catch_warnings():
+                # Older NumPy warns instead of raising on unparsable text
+                warnings.simplefilter('ignore', DeprecationWarning)
+                data = np.fromstring(body, dtype=np.float32, sep=' ')
+        except ValueError:
+            pass
+    if data is None or data.size != size ** 3 * 3:
+        # Comments or other text inside the table: use the slower, tolerant parser
+        data = np.loadtxt(io.BytesIO(body), comments='#', dtype=np.float32, ndmin=2)
+        if data.shape != (size ** 3, 3):
+            raise ValueError(f"Expected {size ** 3} rows of 3 values, found {data.shape}")
+
+    # .cube tables vary red fastest, so rows reshape to [B][G][R]
+    lut = np.ascontiguousarray(data.reshape(size, size, size, 3).transpose(2, 1, 0, 3))
+    lut.flags.writeable = False
+    return lut
+
+
+def _probe_lut_size(lut_path):
+    """Return the input LUT's size, loading and caching its table if possible.
+
+    Falls back to the header-only get_lut_size_from_file for files that
+    _load_cube cannot handle. Returns None if no size is found.
+    """
     try:
-        # Create an empty config
-        config = ocio.Config()
+        return _probe_and_load(lut_path)[0]
+    except (OSError, ValueError):
+        return get_lut_size_from_file(lut_path)
+
+
+def _identity_grid(cube_size):
+    """Return the (cube_size**3, 3) float32 identity grid in .cube row order."""
+    grid = np.linspace(0.0, 1.0, cube_size, dtype=np.float32)
+    B, G, R = np.meshgrid(grid, grid, grid, indexing='ij')
+    return np.stack([R.ravel(), G.ravel(), B.ravel()], axis=1)
+
+
+def _eval_tetrahedral(lut, points, xp=np):
+    """Evaluate a 3D LUT at points using tetrahedral interpolation.
+
+    The tetrahedron containing each point is selected by ordering its
+    fractional coordinates; inside it the LUT is affine, so the Jacobian is
+    formed from the differences between consecutive corners.
+
+    Args:
+        lut (np.ndarray): (N, N, N, 3) LUT indexed [R][G][B]. May be stored
+            at lower precision; corners are upcast to the dtype of points.
+        points (np.ndarray): (M, 3) input coordinates in [0, 1].
+        xp (module): Array module of lut and points (numpy or cupy).
+
+    Returns:
+        tuple: (values, jacobian)
+            values   — (M, 3) interpolated LUT outputs
+            jacobian — (M, 3, 3) derivative of the output w.r.t. the input
+    """
+    n = lut.shape[0]
+    scaled = points * (n - 1)
+    base = xp.clip(xp.floor(scaled).astype(xp.intp), 0, n - 2)
+    frac = scaled - base
+
+    # Axes in order of decreasing fraction; walk c000 -> ... -> c111 along them
+    code = (4 * (frac[:, 0] >= frac[:, 1]) + 2 * (frac[:, 1] >= frac[:, 2])
+            + (frac[:, 0] >= frac[:, 2]))
+    order = xp.asarray(_TET_ORDER)[code]
+    rows = xp.arange(len(points))[:, None]
+
+    corner = base.copy()
+    prev = lut[corner[:, 0], corner[:, 1], corner[:, 2]].astype(points.dtype)
+    values = prev.copy()
+    jacobian = xp.empty((len(points), 3, 3), dtype=points.dtype)
+    for k in range(3):
+        axis = order[:, k]
+        corner[rows[:, 0], axis] += 1
+        cur = lut[corner[:, 0], corner[:, 1], corner[:, 2]].astype(points.dtype)
+        delta = cur - prev
+        values += frac[rows, axis[:, None]] * delta
+        jacobian[rows[:, 0], :, axis] = delta * (n - 1)
+        prev = cur
+    return values, jacobian
+
+
+def _seed_inverse(lut, cube_size, seed_size=_SEED_GRID_SIZE):
+    """Seed every grid point from the inverse of a coarse identity grid.
+
+    The seed_size**3 coarse targets start from the nearest node of a
+    coarse forward lattice and are refined with Newton. Each full-grid
+    target then starts from the solution of its nearest coarse target,
+    which is a plain index lookup since both grids are identity grids.
+    """
+    n = lut.shape[0]
+    idx = np.unique(np.linspace(0, n - 1, min(seed_size, n)).round().astype(np.intp))
+    nodes = lut[np.ix_(idx, idx, idx)].reshape(-1, 3)
+    coords = (idx / (n - 1)).astype(np.float32)
+    R, G, B = np.meshgrid(coords, coords, coords, indexing='ij')
+    node_inputs = np.stack([R.ravel(), G.ravel(), B.ravel()], axis=1)
+
+    coarse_targets = _identity_grid(seed_size)
+    dist = np.sum(nodes ** 2, axis=1)[None, :] - 2.0 * (coarse_targets @ nodes.T)
+    coarse = node_inputs[np.argmin(dist, axis=1)]
+    _refine_inverse(lut, coarse_targets, coarse, 2 * _NEWTON_ITERATIONS)
+
+    near = np.rint(np.arange(cube_size) * ((seed_size - 1) / (cube_size - 1))).astype(np.intp)
+    coarse = coarse.reshape(seed_size, seed_size, seed_size, 3)
+    return coarse[near[:, None, None], near[None, :, None], near].reshape(-1, 3)
+
+
+def _reachable_targets(lut, cube_size):
+    """Flag the identity-grid targets that may have an exact preimage.
+
+    Tetrahedral interpolation stays inside the bounding box of a cell's
+    corners, so a target outside every cell's output box cannot be hit.
+    The boxes are stamped into a difference array and summed, which finds
+    those targets without a search.
+
+    Returns:
+        np.ndarray: (cube_size**3,) bool mask in .cube row order.
+    """
+    # Per-cell min and max of the 8 corners, one axis at a time
+    lo, hi = lut, lut
+    for axis in range(3):
+        head = [slice(None)] * 3
+        tail = [slice(None)] * 3
+        head[axis], tail[axis] = slice(None, -1), slice(1, None)
+        lo = np.minimum(lo[tuple(head)], lo[tuple(tail)])
+        hi = np.maximum(hi[tuple(head)], hi[tuple(tail)])
+
+    scale = cube_size - 1
+    slack = _NEWTON_TOLERANCE * scale
+    lo = np.ceil(lo.reshape(-1, 3) * scale - slack)
+    hi = np.floor(hi.reshape(-1, 3) * scale + slack)
+    lo = np.clip(lo, 0, scale + 1).astype(np.intp)
+    hi = np.clip(hi, -1, scale).astype(np.intp) + 1
+    keep = np.all(lo < hi, axis=1)
+    lo, hi = lo[keep], hi[keep]
+
+    # +1 / -1 on the 8 corners of each box; indexed [B][G][R] like .cube rows
+    side = cube_size + 1
+    stride = np.array([1, side, side * side])
+    counts = np.zeros(side ** 3, dtype=np.int64)
+    for corner in range(8):
+        pick = [(corner >> k) & 1 for k in range(3)]
+        flat = sum((hi if pick[k] else lo)[:, k] * stride[k] for k in range(3))
+        sign = -1 if sum(pick) % 2 else 1
+        counts += sign * np.bincount(flat, minlength=side ** 3)
+    counts = counts.reshape(side, side, side)
+    for axis in range(3):
+        np.cumsum(counts, axis=axis, out=counts)
+    return counts[:-1, :-1, :-1].ravel() > 0
+
+
+def _invert_lut(lut, cube_size, iterations=_NEWTON_ITERATIONS):
+    """Compute the inverse of a 3D LUT sampled on an identity grid.
+
+    Each grid point is seeded by _seed_inverse and then refined with
+    damped Newton steps on the tetrahedral interpolant, in a parallel Numba
+    kernel when Numba is installed. Targets no LUT cell can reach skip
+    Newton; they and the points Newton leaves above _NEWTON_TOLERANCE (it
+    can stall against the [0, 1] clip on steep or clipped LUTs) get OCIO's
+    exact inverse from _repair_inverse.
+
+    Args:
+        lut (np.ndarray): (N, N, N, 3) forward LUT indexed [R][G][B].
+        cube_size (int): The resolution of the inverse LUT.
+        iterations (int): Number of Newton refinement steps.
+
+    Returns:
+        np.ndarray: (cube_size**3, 3) float32 inverse LUT in .cube row order.
+    """
+    targets = _identity_grid(cube_size)
+    x = _seed_inverse(lut, cube_size)
+    pending = ~_reachable_targets(lut, cube_size)
+    reachable = np.flatnonzero(~pending)
+    solving = x[reachable]
+    unsolved = _refine_inverse(lut, targets[reachable], solving, iterations)
+    x[reachable] = solving
+    pending[reachable[unsolved]] = True
+    return _repair_inverse(lut, targets, x, pending)
+
+
+def _refine_inverse(lut, targets, x, iterations):
+    """Run Newton in the Numba kernel if available, else in NumPy.
+
+    Returns:
+        np.ndarray: Indices of the targets still above _NEWTON_TOLERANCE.
+    """
+    if numba is None:
+        return _newton_refine(lut, targets, x, iterations)
+    solved = np.zeros(len(x), dtype=np.bool_)
+    _invert_lut_kernel(lut, targets, x, solved, iterations)
+    return np.flatnonzero(~solved)
+
+
+def _newton_refine(lut, targets, x, iterations, xp=np):
+    """Vectorized damped Newton steps on the tetrahedral interpolant.
+
+    Args:
+        lut (np.ndarray): (N, N, N, 3) forward LUT indexed [R][G][B].
+        targets (np.ndarray): (M, 3) output values to invert.
+        x (np.ndarray): (M, 3) seeds, refined in place.
+        iterations (int): Number of Newton refinement steps.
+        xp (module): Array module of the arrays (numpy or cupy).
+
+    Returns:
+        np.ndarray: Indices of the targets still above _NEWTON_TOLERANCE.
+    """
+    damping = xp.float32(1e-6) * xp.eye(3, dtype=xp.float32)
+    active = xp.arange(len(x))
+    # One evaluation more than steps, so the last step is checked as well
+    for k in range(iterations + 1):
+        values, jac = _eval_tetrahedral(lut, x[active], xp)
+        residual = values - targets[active]
+        # Voxels already within tolerance skip the remaining Newton steps
+        keep = xp.sum(residual * residual, axis=1) >= _NEWTON_TOLERANCE ** 2
+        active, jac, residual = active[keep], jac[keep], residual[keep]
+        if not len(active) or k == iterations:
+            break
+        # Normal equations keep flat (singular) regions of the LUT solvable
+        jt = xp.swapaxes(jac, 1, 2)
+        step = xp.linalg.solve(jt @ jac + damping, (jt @ residual[..., None]))[..., 0]
+        x[active] = xp.clip(x[active] - step, 0.0, 1.0)
+    return active
+
+
+def _exact_inverse(lut, targets):
+    """Invert a 3D LUT at arbitrary targets with OCIO's exact inverse.
+
+    Args:
+        lut (np.ndarray): (N, N, N, 3) forward LUT indexed [R][G][B].
+        targets (np.ndarray): (M, 3) output values to invert.
+
+    Returns:
+        np.ndarray: (M, 3) float32 inputs that the LUT maps onto the targets.
+    """
+    transform = ocio.Lut3DTransform(gridSize=lut.shape[0])
+    transform.setData(np.ascontiguousarray(lut, dtype=np.float32).ravel())
+    transform.setInterpolation(ocio.INTERP_TETRAHEDRAL)
+    transform.setDirection(ocio.TRANSFORM_DIR_INVERSE)
+    processor = ocio.Config().getProcessor(transform)
+    # LOSSLESS keeps the exact inverse rather than a resampled approximation
+    cpu = processor.getOptimizedCPUProcessor(ocio.OPTIMIZATION_LOSSLESS)
+    inverse = np.array(targets, dtype=np.float32)
+    cpu.applyRGB(inverse)
+    return inverse
+
+
+def _repair_inverse(lut, targets, x, pending):
+    """Give the pending targets OCIO's exact inverse instead, in place.
+
+    Args:
+        lut (np.ndarray): (N, N, N, 3) forward LUT indexed [R][G][B].
+        targets (np.ndarray): (M, 3) output values being inverted.
+        x (np.ndarray): (M, 3) Newton solutions, updated in place.
+        pending (np.ndarray): (M,) bool mask of the targets Newton did not
+            solve or skipped.
+
+    Returns:
+        np.ndarray: x.
+    """
+    pending = np.flatnonzero(pending)
+    if len(pending):
+        x[pending] = _exact_inverse(lut, targets[pending])
+    return x
+
+
+def _invert_lut_kernel(fwd, targets, out, solved, iterations):
+    """Numba kernel behind _invert_lut: damped Newton steps per target.
+
+    Args:
+        fwd (np.ndarray): (N, N, N, 3) forward LUT indexed [R][G][B].
+        targets (np.ndarray): (M, 3) output values to invert.
+        out (np.ndarray): (M, 3) seeds, refined in place.
+        solved (np.ndarray): (M,) bool, set where the residual fell below
+            _NEWTON_TOLERANCE.
+        iterations (int): Number of Newton refinement steps.
+    """
+    n = fwd.shape[0]
+    scale = n - 1
+    tolerance_sq = _NEWTON_TOLERANCE ** 2
+    for i in numba.prange(len(targets)):
+        t0, t1, t2 = targets[i, 0], targets[i, 1], targets[i, 2]
+        x0, x1, x2 = out[i, 0], out[i, 1], out[i, 2]
+
+        # One evaluation more than steps, so the last step is checked as well
+        for k in range(iterations + 1):
+            b0 = min(int(x0 * scale), n - 2)
+            b1 = min(int(x1 * scale), n - 2)
+            b2 = min(int(x2 * scale), n - 2)
+            f = (x0 * scale - b0, x1 * scale - b1, x2 * scale - b2)
+
+            # Branchless tetrahedron selection: pack the three comparisons
+            # into a code and look the axis order up in _TET_ORDER
+            tet = (f[0] >= f[1]) << 2 | (f[1] >= f[2]) << 1 | (f[0] >= f[2])
+            a1, a2, a3 = _TET_ORDER[tet, 0], _TET_ORDER[tet, 1], _TET_ORDER[tet, 2]
+
+            # Walk c000 -> c111 along those axes; each edge is a Jacobian column
+            i0, i1, i2 = b0 + (a1 == 0), b1 + (a1 == 1), b2 + (a1 == 2)
+            j0, j1, j2 = i0 + (a2 == 0), i1 + (a2 == 1), i2 + (a2 == 2)
+            p0, p1, p2 = fwd[b0, b1, b2, 0], fwd[b0, b1, b2, 1], fwd[b0, b1, b2, 2]
+            q0, q1, q2 = fwd[i0, i1, i2, 0], fwd[i0, i1, i2, 1], fwd[i0, i1, i2, 2]
+            r0, r1, r2 = fwd[j0, j1, j2, 0], fwd[j0, j1, j2, 1], fwd[j0, j1, j2, 2]
+            s0, s1, s2 = (fwd[b0 + 1, b1 + 1, b2 + 1, 0], fwd[b0 + 1, b1 + 1, b2 + 1, 1],
+                          fwd[b0 + 1, b1 + 1, b2 + 1, 2])
+            ux, uy, uz = q0 - p0, q1 - p1, q2 - p2
+            vx, vy, vz = r0 - q0, r1 - q1, r2 - q2
+            wx, wy, wz = s0 - r0, s1 - r1, s2 - r2
+            fa, fb, fc = f[a1], f[a2], f[a3]
+            e0 = p0 + fa * ux + fb * vx + fc * wx - t0
+            e1 = p1 + fa * uy + fb * vy + fc * wy - t1
+            e2 = p2 + fa * uz + fb * vz + fc * wz - t2
+            if e0 * e0 + e1 * e1 + e2 * e2 < tolerance_sq:
+                solved[i] = True
+                break  # Already inverted; skip the solve and later steps
+            if k == iterations:
+                break
+
+            # Solve (C^T C + damping) d = C^T e by Cramer's rule, C = [u v w] * scale
+            m00 = (ux * ux + uy * uy + uz * uz) * scale * scale + 1e-6
+            m11 = (vx * vx + vy * vy + vz * vz) * scale * scale + 1e-6
+            m22 = (wx * wx + wy * wy + wz * wz) * scale * scale + 1e-6
+            m01 = (ux * vx + uy * vy + uz * vz) * scale * scale
+            m02 = (ux * wx + uy * wy + uz * wz) * scale * scale
+            m12 = (vx * wx + vy * wy + vz * wz) * scale * scale
+            g0 = (ux * e0 + uy * e1 + uz * e2) * scale
+            g1 = (vx * e0 + vy * e1 + vz * e2) * scale
+            g2 = (wx * e0 + wy * e1 + wz * e2) * scale
+            c00 = m11 * m22 - m12 * m12
+            c01 = m02 * m12 - m01 * m22
+            c02 = m01 * m12 - m02 * m11
+            det = m00 * c00 + m01 * c01 + m02 * c02
+            d0 = (c00 * g0 + c01 * g1 + c02 * g2) / det
+            d1 = (c01 * g0 + (m00 * m22 - m02 * m02) * g1 + (m01 * m02 - m00 * m12) * g2) / det
+            d2 = (c02 * g0 + (m01 * m02 - m00 * m12) * g1 + (m00 * m11 - m01 * m01) * g2) / det
+
+            # Map the step back from tetrahedron edges to R, G, B
+            d = (d0, d1, d2)
+            x0 = min(max(x0 - d[_TET_RANK[tet, 0]], 0.0), 1.0)
+            x1 = min(max(x1 - d[_TET_RANK[tet, 1]], 0.0), 1.0)
+            x2 = min(max(x2 - d[_TET_RANK[tet, 2]], 0.0), 1.0)
+
+        out[i, 0], out[i, 1], out[i, 2] = x0, x1, x2
+
+
+if numba is not None:
+    _invert_lut_kernel = numba.njit(parallel=True, fastmath=True, cache=True)(_invert_lut_kernel)
+
+
+def _invert_lut_gpu(lut, cube_size, iterations=_NEWTON_ITERATIONS, half_precision=False):
+    """Compute the inverse of a 3D LUT on the GPU with CuPy.
+
+    Runs the same tetrahedral Newton scheme as _invert_lut, with every grid
+    point refined at once on the device, so --gpu output and the --map
+    analysis use the same interpolation model as the CPU path. Seeding and
+    _repair_inverse run on the CPU.
+
+    With half_precision, and from _GPU_HALF_MIN_SIZE up, the LUT is kept on
+    the device as float16 to halve the memory traffic of the interpolation;
+    corners are upcast to float32 before the Newton solve, and the repair
+    judges the result against that same float16 table. The roundoff can
+    change the 4th decimal of the output, so it is opt-in.
+
+    Args:
+        lut (np.ndarray): (N, N, N, 3) forward LUT indexed [R][G][B].
+        cube_size (int): The resolution of the inverse LUT.
+        iterations (int): Number of Newton refinement steps.
+        half_precision (bool): Store the LUT on the device as float16.
+
+    Returns:
+        np.ndarray: (cube_size**3, 3) float32 inverse LUT in .cube row order.
+    """
+    storage = cupy.float32
+    if half_precision and cube_size >= _GPU_HALF_MIN_SIZE:
+        # Seed and repair on the host against the same rounded values;
+        # measured against the float32 table, float16 roundoff alone would
+        # leave nearly every voxel above _NEWTON_TOLERANCE
+        storage = cupy.float16
+        lut = lut.astype(np.float16).astype(np.float32)
+    targets = _identity_grid(cube_size)
+    x = _seed_inverse(lut, cube_size)
+    pending = ~_reachable_targets(lut, cube_size)
+    reachable = np.flatnonzero(~pending)
+    solving = cupy.asarray(x[reachable])
+    unsolved = _newton_refine(cupy.asarray(lut, dtype=storage), cupy.asarray(targets[reachable]),
+                              solving, iterations, xp=cupy)
+    x[reachable] = cupy.asnumpy(solving)
+    pending[reachable[cupy.asnumpy(unsolved)]] = True
+    return _repair_inverse(lut, targets, x, pending)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_ocio_config():
+    """Return the shared Config used by the OCIO fallback.
+
+    The config only holds the "raw" reference space; the temporary LUT
+    color space is swapped in by _sample_ocio_inverse for every file.
+    """
+    # Create an empty config
+    config = ocio.Config()
+
+    # Define a basic "raw" color space to act as the reference
+    raw_cs_name = "raw"
+    raw_cs = ocio.ColorSpace(name=raw_cs_name, description="Linear reference space")
+    config.addColorSpace(raw_cs)
+    # Assign the scene_linear role to our "raw" space
+    config.setRole(ocio.ROLE_SCENE_LINEAR, raw_cs_name)
+    return config
+
+
+def _bake_with_ocio(input_lut_path, cube_size):
+    """Compute the inverse of a LUT with OpenColorIO.
+
+    Used for inputs that _load_cube cannot handle (other file formats,
+    1D/shaper LUTs, non-unit domains). Results are cached per file
+    modification time, so reversing an unchanged LUT again is free.
+
+    Args:
+        input_lut_path (str): Path to the input LUT file.
+        cube_size (int): The resolution of the output reversed LUT.
+
+    Returns:
+        np.ndarray: (cube_size**3, 3) float32 inverse LUT in .cube row order.
+    """
+    input_lut_path = os.path.abspath(input_lut_path)
+    return _sample_ocio_inverse(input_lut_path, os.path.getmtime(input_lut_path), cube_size)
+
+
+@functools.lru_cache(maxsize=64)
+def _sample_ocio_inverse(input_lut_path, mtime, cube_size):
+    """Sample the inverse LUT processor; cached on (path, mtime, cube_size)."""
+    with _OCIO_LOCK:
+        # OCIO caches parsed LUT files by path, so drop them if the file changed
+        if _OCIO_MTIMES.setdefault(input_lut_path, mtime) != mtime:
+            ocio.ClearAllCaches()
+            _OCIO_MTIMES[input_lut_path] = mtime
 
-        # Define a basic "raw" color space to act as the reference
-        raw_cs_name = "raw"
-        raw_cs = ocio.ColorSpace(name=raw_cs_name, description="Linear reference space")
-        config.addColorSpace(raw_cs)
-        # Assign the scene_linear role to our "raw" space
-        config.setRole(ocio.ROLE_SCENE_LINEAR, raw_cs_name)
+        config = _get_ocio_config()
 
         # Define the forward transform (reading the LUT)
-        forward_transform = ocio.FileTransform(input_lut_path, interpolation=ocio.INTERP_LINEAR)
+        forward_transform = ocio.FileTransform(input_lut_path, interpolation=ocio.INTERP_TETRAHEDRAL)
 
-        # Create a temporary color space
+        # Create a temporary color space, replacing the previous file's one
         temp_cs_name = "temp_lut_colorspace"
         temp_cs = ocio.ColorSpace(name=temp_cs_name)
         # Set the transform FROM reference (raw) TO this space using the forward LUT
         temp_cs.setTransform(forward_transform, ocio.COLORSPACE_DIR_FROM_REFERENCE)
         config.addColorSpace(temp_cs)
 
-        # Create a Baker
-        baker = ocio.Baker()
-        baker.setConfig(config)
-        baker.setFormat("cinespace")
-        baker.setCubeSize(cube_size)
-
-        # Set the input space to the temporary space and target to the reference (raw/scene_linear).
-        # Baking FROM temp_cs TO raw will now generate the inverse of the forward_transform.
-        baker.setInputSpace(temp_cs_name)
-        baker.setTargetSpace(ocio.ROLE_SCENE_LINEAR)
-
-        # Bake the LUT data using the cinespace format
-        baked_output_string = baker.bake()
-
-        # --- Filter the baked output to get only numerical data lines ---
-        numerical_data_lines = []
-        for line in baked_output_string.splitlines():
-            line = line.strip()
-            # Skip lines that look like LUT size declarations (e.g. "4 4 4")
-            if re.match(r'^\d+\s+\d+\s+\d+$', line):
-                continue
-            # Basic check: does the line contain roughly 3 space-separated numbers?
-            parts = line.split()
-            if len(parts) == 3:
-                try:
-                    # Attempt to convert to float to ensure they are numbers
-                    float(parts[0])
-                    float(parts[1])
-                    float(parts[2])
-                    numerical_data_lines.append(line)
-                except ValueError:
-                    # Line parts are not all numbers, skip
-                    continue
-        # Join the valid lines back together
-        cleaned_lut_data = "\n".join(numerical_data_lines)
-        # --- End Filtering ---
+        # Going FROM the temporary space TO the reference (raw/scene_linear)
+        # applies the inverse of the forward transform.
+        processor = config.getProcessor(temp_cs_name, ocio.ROLE_SCENE_LINEAR)
+        # LOSSLESS keeps the exact 3D LUT inverse; the default optimization
+        # level approximates it with a resampled table (LUT_INV_FAST)
+        cpu = processor.getOptimizedCPUProcessor(ocio.OPTIMIZATION_LOSSLESS)
+
+    # Evaluate the inverse directly on the identity grid, in .cube row order
+    inverse = _identity_grid(cube_size)
+    cpu.applyRGB(inverse)
+    # Shared by every caller through the cache
+    inverse.flags.writeable = False
+    return inverse
+
+
+def _write_rows(f, rows):
+    """Write (M, 3) rows to a text file as "%.6f %.6f %.6f" lines.
+
+    Rows are formatted _WRITE_CHUNK_ROWS at a time with one % operation per
+    chunk, so only a chunk's worth of text is alive at once and the output
+    matches np.savetxt(f, rows, fmt='%.6f %.6f %.6f').
+    """
+    for start in range(0, len(rows), _WRITE_CHUNK_ROWS):
+        chunk = rows[start:start + _WRITE_CHUNK_ROWS]
+        f.write((_ROW_FORMAT * len(chunk)) % tuple(chunk.ravel().tolist()))
+
+
+def reverse_lut(input_lut_path, output_lut_path, cube_size=DEFAULT_CUBE_SIZE, use_gpu=False,
+                half_precision=False):
+    """
+    Reverses a 3D LUT file.
+
+    .cube LUTs are inverted directly in NumPy (or CuPy); other inputs are
+    baked through OpenColorIO.
+
+    Args:
+        input_lut_path (str): Path to the input .cube LUT file.
+        output_lut_path (str): Path to save the reversed .cube LUT file.
+        cube_size (int): The resolution of the output reversed LUT.
+        use_gpu (bool): If True and CuPy is installed, invert on the GPU.
+        half_precision (bool): With use_gpu, store the LUT as float16 on the
+            GPU. Faster, but may change the 4th decimal of the output.
+
+    Returns:
+        bool: True if the reversed LUT was written, False otherwise.
+    """
+    if not os.path.exists(input_lut_path):
+        print(f"Error: Input LUT file not found: {input_lut_path}")
+        return False
+
+    try:
+        try:
+            lut = _load_cube(input_lut_path)
+        except ValueError as e:
+            print(f"Falling back to OpenColorIO: {e}")
+            inverse = _bake_with_ocio(input_lut_path, cube_size)
+        else:
+            if use_gpu and cupy is None:
+                print("Warning: CuPy is not installed. Inverting on the CPU.")
+            if use_gpu and cupy is not None:
+                inverse = _invert_lut_gpu(lut, cube_size, half_precision=half_precision)
+            else:
+                inverse = _invert_lut(lut, cube_size)
 
         # Construct a minimal standard .cube header
         input_filename_base = os.path.basename(input_lut_path)
@@ -276,34 +871,114 @@ DOMAIN_MIN 0.0 0.0 0.0
 DOMAIN_MAX 1.0 1.0 1.0
 """ # Ends with a newline
 
-        # Write the header and the cleaned numerical data to the output file using CRLF line endings
-        with open(output_lut_path, 'w', newline='\r\n') as f:
+        # Write the header and the numerical data to the output file using CRLF line endings.
+        # Rows stream into a 1 MiB buffer a chunk at a time rather than as one big string.
+        with open(output_lut_path, 'wb', buffering=1 << 20) as raw, \
+                io.TextIOWrapper(raw, encoding='utf-8', newline='\r\n') as f:
             f.write(header)
-            # Add the blank line separator if the header doesn't end with one (it does)
-            # f.write('\n') # Header already ends with \n
-            f.write(cleaned_lut_data)
-            # Ensure the file ends with a newline
-            if not cleaned_lut_data.endswith('\n'):
-                 f.write('\n')
+            _write_rows(f, inverse)
 
         print(f"Successfully reversed LUT saved to: {output_lut_path}")
+        return True
 
     except Exception as e:
         print(f"An error occurred during LUT reversal: {e}")
+        return False
 
-if __name__ == "__main__":
+def _reverse_worker(job):
+    """Process-pool entry point: reverse one LUT, reading its size if needed.
+
+    Args:
+        job (tuple): (input_lut_path, output_lut_path, cube_size, use_gpu,
+            half_precision); a cube_size of None means "read it from the input file".
+
+    Returns:
+        str: The output path, or None if the reversal failed.
+    """
+    input_lut_path, output_lut_path, cube_size, use_gpu, half_precision = job
+    if cube_size is None:
+        cube_size = _probe_lut_size(input_lut_path) or DEFAULT_CUBE_SIZE
+    if reverse_lut(input_lut_path, output_lut_path, cube_size, use_gpu=use_gpu,
+                   half_precision=half_precision):
+        return output_lut_path
+    return None
+
+
+def _init_worker(num_threads):
+    """Process-pool initializer: give each worker's Numba kernel its share
+    of the cores, so the pool as a whole does not oversubscribe the CPU.
+    """
+    if numba is not None:
+        numba.set_num_threads(max(1, min(num_threads, numba.config.NUMBA_NUM_THREADS)))
+
+
+def reverse_luts(input_lut_paths, output_dir=None, cube_size=None, use_gpu=False,
+                 half_precision=False, max_workers=None):
+    """Reverse many LUT files in parallel, up to one worker process per CPU core.
+
+    With use_gpu a single worker drives the GPU, so the LUTs do not each
+    open a CUDA context on the same device.
+
+    Each output is written as '<name>_reversed<ext>' next to its input, or
+    into output_dir if given.
+
+    Args:
+        input_lut_paths (list): Paths to the input .cube LUT files.
+        output_dir (str): (Optional) Directory for the reversed LUTs.
+        cube_size (int): (Optional) Resolution of every output LUT. If None,
+            each file's own LUT_3D_SIZE (or the default) is used.
+        use_gpu (bool): If True and CuPy is installed, invert on the GPU.
+        half_precision (bool): With use_gpu, store the LUTs as float16.
+        max_workers (int): (Optional) Number of processes; defaults to the
+            number of CPUs, or 1 with use_gpu. Never more than the number
+            of files.
+
+    Returns:
+        list: The output paths, in input order; None for inputs that failed.
+    """
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    jobs = []
+    for input_lut_path in input_lut_paths:
+        base, ext = os.path.splitext(input_lut_path)
+        output_lut_path = f"{base}_reversed{ext}"
+        if output_dir:
+            output_lut_path = os.path.join(output_dir, os.path.basename(output_lut_path))
+        jobs.append((input_lut_path, output_lut_path, cube_size, use_gpu, half_precision))
+
+    cpu_count = os.cpu_count() or 1
+    if max_workers is None:
+        max_workers = 1 if use_gpu and cupy is not None else cpu_count
+    max_workers = max(1, min(max_workers, len(jobs)))
+
+    # Cores not covered by a worker process go to its Numba threads
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(cpu_count // max_workers,)) as executor:
+        return list(executor.map(_reverse_worker, jobs))
+
+
+def main():
     def print_usage():
         print("""
-Usage: python lut_reverser.py <input_lut> [output_lut] [cube_size] [--map [output_dir]] [--grayscale]
+Usage: python lut_reverser.py <input_lut> [output_lut] [cube_size] [--map [output_dir]] [--grayscale] [--gpu [--half]]
+       python lut_reverser.py "<glob_pattern>" [output_dir] [cube_size] [--gpu [--half]]
 
 Arguments:
     input_lut       - Path to the input .cube LUT file
+    glob_pattern    - Quoted pattern (e.g. "luts/*.cube") to reverse many LUTs
+                      in parallel; outputs are named '<name>_reversed.cube'
     output_lut      - (Optional) Path to save the reversed .cube LUT file
+    output_dir      - (Optional) Directory for batch outputs (default: next
+                      to each input)
     cube_size       - (Optional) Resolution of the output LUT (default: 33)
     --map [dir]     - (Optional) Generate an irreversibility map (color heatmap
                       by default). If dir is omitted, saves to '<input_name>_analysis/'.
     --grayscale     - (Optional) Use grayscale instead of color heatmap.
                       Only meaningful with --map.
+    --gpu           - (Optional) Invert the LUT on the GPU (requires CuPy).
+    --half          - (Optional) Store the LUT as float16 on the GPU. Faster,
+                      but may change the 4th decimal. Only meaningful with --gpu.
 
 Examples:
     python lut_reverser.py input.cube
@@ -311,14 +986,19 @@ Examples:
     python lut_reverser.py input.cube --map
     python lut_reverser.py input.cube --map --grayscale
     python lut_reverser.py input.cube output.cube 64 --map analysis_dir
+    python lut_reverser.py input.cube --gpu
+    python lut_reverser.py input.cube --gpu --half
+    python lut_reverser.py "luts/*.cube" reversed_luts
 """)
 
-    default_cube_size = 33
+    default_cube_size = DEFAULT_CUBE_SIZE
     input_filename = None
     output_filename = None
     output_cube_size = None
     map_output_dir = None  # None means no map generation
     use_grayscale = False
+    use_gpu = False
+    half_precision = False
 
     # Parse arguments, handling --map and --grayscale flags
     args = sys.argv[1:]  # skip script name
@@ -328,6 +1008,16 @@ Examples:
         use_grayscale = True
         args.remove('--grayscale')
 
+    # Check for --gpu (can appear anywhere)
+    if '--gpu' in args:
+        use_gpu = True
+        args.remove('--gpu')
+
+    # Check for --half (can appear anywhere)
+    if '--half' in args:
+        half_precision = True
+        args.remove('--half')
+
     # Check for --map and extract its value
     if '--map' in args:
         map_idx = args.index('--map')
@@ -337,10 +1027,49 @@ Examples:
             map_output_dir = args.pop(map_idx)
         else:
             map_output_dir = ''  # Will be resolved to default later
-        # Reconstruct sys.argv-like list for remaining parsing
-        remaining = [sys.argv[0]] + args
-    else:
-        remaining = sys.argv
+
+    # Reconstruct sys.argv-like list for remaining parsing
+    remaining = [sys.argv[0]] + args
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    # --- Batch mode: the input is a glob pattern ---
+    # An existing file is never a pattern, even if its name has brackets
+    pattern = None
+    if len(remaining) > 1:
+        pattern = remaining[1]
+        if not os.path.isabs(pattern):
+            pattern = os.path.join(script_dir, pattern)
+    if pattern and not os.path.exists(pattern) and glob.has_magic(pattern):
+        # Skip the outputs of an earlier run matched by the same pattern
+        input_lut_paths = sorted(
+            path for path in glob.glob(pattern)
+            if not os.path.splitext(path)[0].endswith('_reversed'))
+        if not input_lut_paths:
+            print(f"Error: No LUT files match: {pattern}")
+            sys.exit(1)
+
+        batch_output_dir = None
+        if len(remaining) > 2:
+            batch_output_dir = remaining[2]
+            if not os.path.isabs(batch_output_dir):
+                batch_output_dir = os.path.join(script_dir, batch_output_dir)
+        if len(remaining) > 3:
+            try:
+                output_cube_size = int(remaining[3])
+                print(f"Using specified cube size: {output_cube_size}")
+            except ValueError:
+                print(f"Warning: Invalid cube size argument '{remaining[3]}'. Will read each input's size or use default.")
+        if map_output_dir is not None:
+            print("Warning: --map is not supported in batch mode and will be ignored.")
+
+        print(f"Reversing {len(input_lut_paths)} LUT files...")
+        results = reverse_luts(input_lut_paths, batch_output_dir, output_cube_size,
+                               use_gpu=use_gpu, half_precision=half_precision)
+        failed = results.count(None)
+        if failed:
+            print(f"Error: {failed} of {len(results)} LUT files could not be reversed.")
+            sys.exit(1)
+        return
 
     # Check command line arguments (using filtered args)
     if len(remaining) == 1:
@@ -364,7 +1093,6 @@ Examples:
                 output_cube_size = None
 
     # --- Determine Paths ---
-    script_dir = os.path.dirname(os.path.abspath(__file__))
     if not os.path.isabs(input_filename):
         input_lut_path = os.path.join(script_dir, input_filename)
     else:
@@ -385,7 +1113,8 @@ Examples:
     if output_cube_size is None: # If not specified via command line
         print(f"Attempting to read cube size from input file: {input_lut_path}")
         if os.path.exists(input_lut_path):
-            read_size = get_lut_size_from_file(input_lut_path)
+            # Also loads the table, so reverse_lut below reuses it from the cache
+            read_size = _probe_lut_size(input_lut_path)
             if read_size:
                 output_cube_size = read_size
                 print(f"Using cube size from input file: {output_cube_size}")
@@ -399,7 +1128,8 @@ Examples:
 
 
     # Reverse the LUT using the determined size
-    reverse_lut(input_lut_path, output_lut_path, output_cube_size)
+    reverse_lut(input_lut_path, output_lut_path, output_cube_size, use_gpu=use_gpu,
+                half_precision=half_precision)
 
     # --- Generate irreversibility map if requested ---
     if map_output_dir is not None:
@@ -423,3 +1153,7 @@ Examples:
             print("Irreversibility map generation complete.")
         except Exception as e:
             print(f"Error generating irreversibility map: {e}")
+
+
+if __name__ == "__main__":
+    main()